@@ -26,11 +26,20 @@ import sys
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import ClassVar, List, Literal, NamedTuple, Optional, Tuple
+from typing import (
+    Callable,
+    ClassVar,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 # Attempt to import dependencies
 try:
-    import commentjson
     import pathspec
     from colorama import Fore, Style, init
 except ImportError as e:
@@ -42,8 +51,25 @@ except ImportError as e:
     )
     sys.exit(1)
 
+
+def _import_commentjson():
+    """
+    Import commentjson on first use. It builds a lark parser at import time,
+    which importers that only need e.g. normalize_relpath() shouldn't pay for.
+    """
+    try:
+        import commentjson
+    except ImportError as e:
+        raise ValueError(f"Missing required dependency. {e} (pip install commentjson)")
+    return commentjson
+
+
 # --- Type Definitions & Result Models ---
 
+# fnmatch.fnmatch() is case-insensitive where the OS path case is; mirror that
+# when globs are compiled into regexes.
+_GLOB_GROUP = "(?i:" if os.path.normcase("A") != "A" else "(?:"
+
 ActionType = Literal[
     "inserted",
     "updated",
@@ -162,6 +188,20 @@ class Signature:
             detection_pattern=pattern,
         )
 
+    def path_regex(self) -> str:
+        """
+        Regex source that matches a relpath iff this signature's filters do:
+        required_suffix AND any extension AND any glob (if provided).
+        """
+        parts = [rf"(?=(?s:.*){re.escape(self.required_suffix)}\Z)"]
+        if self.extensions:
+            exts = "|".join(re.escape(ext) for ext in self.extensions)
+            parts.append(rf"(?=(?s:.*)(?:{exts})\Z)")
+        if self.globs:
+            globs = "|".join(fnmatch.translate(glob) for glob in self.globs)
+            parts.append(f"{_GLOB_GROUP}{globs})")
+        return "".join(parts)
+
 
 @dataclass(slots=True, frozen=True)
 class ResolvedConfig:
@@ -295,6 +335,10 @@ class PathHeaderAnnotator:
     DEFAULT_ENCODING: ClassVar[str] = "utf-8"
     FALLBACK_ENCODING: ClassVar[str] = "latin-1"
 
+    # Binary sniffing: read a small probe and look for NUL bytes (git heuristic)
+    BINARY_PROBE_SIZE: ClassVar[int] = 4096
+    BINARY_SNIFF_SIZE: ClassVar[int] = 512
+
     # Regex to detect encoding cookies (PEP 263 style)
     # Checks for: # ... coding=utf-8 ...
     ENCODING_PATTERN: ClassVar[re.Pattern] = re.compile(
@@ -317,6 +361,7 @@ class PathHeaderAnnotator:
         self._global_exclude_spec = global_exclude_spec
         self._dry_run = dry_run
         self._concurrency = max(1, concurrency)
+        self._classify = self._compile_classifier(config.signatures)
 
         if not self._root.is_dir():
             raise FileNotFoundError(f"Root directory not found: {self._root}")
@@ -385,6 +430,7 @@ class PathHeaderAnnotator:
         if not config_file.is_file():
             raise FileNotFoundError(f"Config file not found: {config_path}")
 
+        commentjson = _import_commentjson()
         try:
             with open(config_file, "r", encoding="utf-8") as f:
                 data = commentjson.load(f)
@@ -421,21 +467,16 @@ class PathHeaderAnnotator:
             self._logger.warning("Running in [DRY RUN] mode. No files will be changed.")
 
         report = RunReport()
-        files_to_process = []
 
         self._logger.debug("Collecting and sorting files...")
-        for file_path in self._root.rglob("*"):
-            if file_path.is_file() and not file_path.is_symlink():
-                files_to_process.append(file_path)
-
-        # Deterministic order
-        files_to_process.sort()
+        # Deterministic order (by relpath)
+        files_to_process = sorted(self._iter_files(), key=lambda item: item[1])
         self._logger.debug(f"Found {len(files_to_process)} total files to scan.")
 
         with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
             futures = {
-                executor.submit(self.process_file, path): path
-                for path in files_to_process
+                executor.submit(self.process_file, path, relpath): path
+                for path, relpath in files_to_process
             }
 
             for future in as_completed(futures):
@@ -456,12 +497,36 @@ class PathHeaderAnnotator:
         report.outcomes.sort(key=lambda o: o.path)
         return report
 
-    def process_file(self, file_path: Path) -> FileOutcome:
+    def _iter_files(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (path, relpath) for every regular file under root.
+        Uses os.scandir so file-type checks come from cached directory entries,
+        and builds POSIX relpaths incrementally. Symlinks are not followed.
+        """
+        stack = [(os.fspath(self._root), "")]
+        while stack:
+            dir_path, dir_relpath = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        relpath = dir_relpath + entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, relpath + "/"))
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, relpath
+            except OSError as e:
+                self._logger.debug(f"Skipping unreadable directory {dir_path}: {e}")
+
+    def process_file(
+        self, file_path: Union[str, Path], relpath: Optional[str] = None
+    ) -> FileOutcome:
         """
         Process a single file if it matches a signature.
         This is the core worker function for the thread pool.
+        `relpath` may be passed when the caller already knows it.
         """
-        relpath = self.normalize_relpath(self._root, file_path)
+        if relpath is None:
+            relpath = self.normalize_relpath(self._root, file_path)
 
         try:
             # 1. Global Exclude Check
@@ -473,11 +538,7 @@ class PathHeaderAnnotator:
                 )
 
             # 2. Find Matching Signature
-            matched_sig = None
-            for sig in self._config.signatures:
-                if self._matches_signature(relpath, sig):
-                    matched_sig = sig
-                    break
+            matched_sig = self._classify(relpath)
 
             if not matched_sig:
                 return FileOutcome(path=relpath, action="skipped_no_match")
@@ -495,7 +556,12 @@ class PathHeaderAnnotator:
 
             # 4. File Content Processing
             # Note: lines retain their original line endings (LF or CRLF)
-            encoding, newline_char, lines = self._read_file_content(file_path)
+            file_content = self._read_file_content(file_path)
+            if file_content is None:
+                return FileOutcome(
+                    path=relpath, action="skipped_no_match", reason="binary"
+                )
+            encoding, newline_char, lines = file_content
 
             # Determine where the header should live (after shebangs/cookies)
             target_index = self._calculate_header_index(lines)
@@ -541,53 +607,63 @@ class PathHeaderAnnotator:
                 signature_name=getattr(matched_sig, "name", None),
             )
 
-    def _matches_signature(self, relpath: str, sig: Signature) -> bool:
-        """Check if a relative path matches a signature's filters."""
-        # 1. Must end with required_suffix
-        if not relpath.endswith(sig.required_suffix):
-            return False
+    @staticmethod
+    def _compile_classifier(
+        signatures: List[Signature],
+    ) -> Callable[[str], Optional[Signature]]:
+        """
+        Fuse all signature filters into one compiled alternation, so finding
+        the signature for a path is a single regex call. Alternatives are
+        tried in order, so the first matching signature wins.
+        """
+        if not signatures:
+            return lambda relpath: None
 
-        # 2. Check extensions (if provided)
-        if sig.extensions:
-            if not any(relpath.endswith(ext) for ext in sig.extensions):
-                return False
+        match = re.compile(
+            "|".join(f"({sig.path_regex()})" for sig in signatures)
+        ).match
 
-        # 3. Check globs (if provided)
-        if sig.globs:
-            if not any(fnmatch.fnmatch(relpath, glob) for glob in sig.globs):
-                return False
+        def classify(relpath: str) -> Optional[Signature]:
+            m = match(relpath)
+            # Globs translate to non-capturing groups, so lastindex is ours.
+            return signatures[m.lastindex - 1] if m else None
 
-        return True
+        return classify
 
-    def _detect_encoding(self, file_path: Path) -> str:
-        """Best-effort encoding detection per spec."""
+    def _decode_content(
+        self, file_path: Union[str, Path], raw: bytes
+    ) -> Tuple[str, str]:
+        """Best-effort encoding detection per spec. Returns (encoding, text)."""
         try:
-            # Try reading as UTF-8 first
-            with open(file_path, "rb") as f:
-                f.read().decode(self.DEFAULT_ENCODING)
-            return self.DEFAULT_ENCODING
+            # Try UTF-8 first
+            return self.DEFAULT_ENCODING, raw.decode(self.DEFAULT_ENCODING)
         except UnicodeDecodeError:
             self._logger.debug(
                 f"File {file_path} not {self.DEFAULT_ENCODING}, "
                 f"falling back to {self.FALLBACK_ENCODING}"
             )
-            return self.FALLBACK_ENCODING
-        except Exception:
-            # File might be empty or unreadable, default to fallback
-            return self.FALLBACK_ENCODING
+            return self.FALLBACK_ENCODING, raw.decode(self.FALLBACK_ENCODING)
 
-    def _read_file_content(self, file_path: Path) -> Tuple[str, str, List[str]]:
+    def _read_file_content(
+        self, file_path: Union[str, Path]
+    ) -> Optional[Tuple[str, str, List[str]]]:
         """
-        Read file using binary-safe text mode.
+        Read file bytes once and decode them without newline translation.
+        - Returns None if the file looks binary (NUL byte near the start).
         - keepends=True ensures we preserve original LF or CRLF per line.
         - newline_char is detected for the purpose of NEW insertions.
         """
-        encoding = self._detect_encoding(file_path)
-
-        # We assume newline='' so python doesn't translate newlines.
-        # This prevents the 'double spacing' bug.
-        with open(file_path, "r", encoding=encoding, newline="") as f:
-            content = f.read()
+        with open(file_path, "rb") as f:
+            head = f.read(self.BINARY_PROBE_SIZE)
+            # Same heuristic git uses: a NUL byte early on means binary.
+            # Bail out before pulling the rest of the blob into memory.
+            if b"\x00" in head[: self.BINARY_SNIFF_SIZE]:
+                return None
+            raw = head + f.read()
+
+        # Decoding bytes directly does no newline translation, which
+        # prevents the 'double spacing' bug.
+        encoding, content = self._decode_content(file_path, raw)
 
         # Detect dominant newline style for *insertion* purposes.
         # If the file uses CRLF, our inserted header should use CRLF.
@@ -604,7 +680,7 @@ class PathHeaderAnnotator:
 
     def _write_file_content(
         self,
-        file_path: Path,
+        file_path: Union[str, Path],
         lines: List[str],
         decision: HeaderDecision,
         encoding: str,
@@ -612,7 +688,7 @@ class PathHeaderAnnotator:
     ):
         """
         Write the modified lines list back to the file.
-        Uses newline='' to ensure we write exact bytes without translation.
+        Encodes once and writes in binary mode, so no newline translation runs.
         """
         # Ensure the new/updated text has the correct line ending attached
         final_text = decision.text + newline_char
@@ -623,10 +699,11 @@ class PathHeaderAnnotator:
             lines[decision.line_index] = final_text
 
         # Since lines have their own endings (keepends=True), we join with empty string.
-        content = "".join(lines)
+        data = "".join(lines).encode(encoding)
 
         # Write back exactly as is.
-        file_path.write_text(content, encoding=encoding, newline="")
+        with open(file_path, "wb") as f:
+            f.write(data)
 
     @classmethod
     def _calculate_header_index(cls, lines: List[str]) -> int:
@@ -655,10 +732,10 @@ class PathHeaderAnnotator:
         return idx
 
     @staticmethod
-    def normalize_relpath(root: Path, file_path: Path) -> str:
+    def normalize_relpath(root: Union[str, Path], file_path: Union[str, Path]) -> str:
         """Return POSIX-style relative path (forward slashes)."""
-        relpath = file_path.relative_to(root)
-        return relpath.as_posix()
+        relpath = os.path.relpath(file_path, root)
+        return relpath.replace(os.sep, "/") if os.sep != "/" else relpath
 
     @staticmethod
     def _decide_header_action(
@@ -1,5 +1,24 @@
 import ast
-from typing import Any, Literal, cast
+import functools
+from typing import Any, Literal
+
+_ENUM_BASES = frozenset({"Enum", "IntEnum", "StrEnum", "Flag", "IntFlag"})
+
+# Constant values that can go into the report as-is. ast.Constant values are
+# always exact builtin types, so set membership on type() is enough.
+_JSON_LITERAL_TYPES = frozenset({str, int, float, bool, type(None)})
+
+_REPR_LITERAL_TYPES = frozenset({str, int, bool, type(None)})
+
+_SEQUENCE_NODES = (ast.List, ast.Tuple, ast.Set)
+
+
+@functools.lru_cache(maxsize=4096)
+def _underscore_visibility(name: str) -> Literal["private", "dunder"]:
+    # Names like __init__/_helper recur across every class in a codebase.
+    if name.startswith("__") and name.endswith("__") and len(name) > 4:
+        return "dunder"
+    return "private"
 
 
 class AstUtils:
@@ -9,16 +28,21 @@ class AstUtils:
 
     @staticmethod
     def get_visibility(name: str) -> Literal["public", "private", "dunder"]:
-        if name.startswith("__") and name.endswith("__") and len(name) > 4:
-            return "dunder"
-        if name.startswith("_"):
-            return "private"
-        return "public"
+        if name[:1] != "_":
+            return "public"
+        return _underscore_visibility(name)
 
     @staticmethod
     def unparse_node(node: ast.expr | None) -> str | None:
         if node is None:
             return None
+        # Bare names and `mod.name` dominate annotations and decorators;
+        # ast.unparse would spin up a full unparser for each of them.
+        kind = type(node)
+        if kind is ast.Name:
+            return node.id
+        if kind is ast.Attribute and type(node.value) is ast.Name:
+            return f"{node.value.id}.{node.attr}"
         try:
             return ast.unparse(node)
         except Exception:
@@ -41,46 +65,80 @@ class AstUtils:
     def extract_literal_value(  # noqa : ignore
         node: ast.expr | None,
     ) -> tuple[Any | None, str]:
-        value_repr = AstUtils.unparse_node(node) or "None"
-
         if node is None:
-            return None, value_repr
+            return None, "None"
+
+        # repr() matches ast.unparse for these, short of u"" prefixes.
+        if type(node) is ast.Constant and node.kind is None:
+            if type(node.value) in _REPR_LITERAL_TYPES:
+                return node.value, repr(node.value)
+
+        value_repr = AstUtils.unparse_node(node) or "None"
 
-        if isinstance(node, ast.Constant):
+        if type(node) is ast.Constant:
             val = node.value
-            if isinstance(val, (str, int, float, bool, type(None))):
+            if type(val) in _JSON_LITERAL_TYPES:
                 return val, value_repr
 
+        # Containers are kept only when every element is a JSON-safe scalar;
+        # tuples and sets come back as lists so both report formats can
+        # serialise them (and set output stays in source order).
+        # Single pass per container: collect values and bail on the first
+        # element that isn't a plain scalar constant.
         try:
-            if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
-                if all(isinstance(e, ast.Constant) for e in node.elts):
-                    val = [e.value for e in node.elts]
-                    if isinstance(node, ast.Tuple):
-                        return tuple(val), value_repr
-                    if isinstance(node, ast.Set):
-                        return set(val), value_repr
-                    return val, value_repr
-
-            if isinstance(node, ast.Dict):
-                if all(
-                    isinstance(k, ast.Constant) and isinstance(v, ast.Constant)
-                    for k, v in zip(node.keys, node.values)
-                ):
-                    val = {k.value: v.value for k, v in zip(node.keys, node.values)}
-                    return val, value_repr
+            if isinstance(node, _SEQUENCE_NODES):
+                items = []
+                for e in node.elts:
+                    if type(e) is not ast.Constant:
+                        break
+                    if type(e.value) not in _JSON_LITERAL_TYPES:
+                        break
+                    items.append(e.value)
+                else:
+                    return items, value_repr
+
+            if type(node) is ast.Dict:
+                mapping = {}
+                for k, v in zip(node.keys, node.values):
+                    if type(k) is not ast.Constant or type(v) is not ast.Constant:
+                        break
+                    if (
+                        type(k.value) not in _JSON_LITERAL_TYPES
+                        or type(v.value) not in _JSON_LITERAL_TYPES
+                    ):
+                        break
+                    mapping[k.value] = v.value
+                else:
+                    return mapping, value_repr
         except Exception:
             pass
 
         return None, value_repr
 
+    @staticmethod
+    def get_assign_name(node: ast.Assign | ast.AnnAssign) -> ast.Name | None:
+        """
+        Returns the Name bound by a simple `X = ...` or `X: T = ...` statement.
+        Tuple unpacking, chained and attribute/subscript targets yield None.
+        """
+        if type(node) is ast.AnnAssign:
+            target = node.target
+        elif len(node.targets) == 1:
+            target = node.targets[0]
+        else:
+            return None
+        return target if type(target) is ast.Name else None
+
     @staticmethod
     def is_enum(node: ast.ClassDef) -> bool:
-        enum_names = {"Enum", "IntEnum", "StrEnum", "Flag", "IntFlag"}
         for base in node.bases:
-            if isinstance(base, ast.Name) and base.id in enum_names:
-                return True
-            if isinstance(base, ast.Attribute) and base.attr in enum_names:
-                return True
+            kind = type(base)
+            if kind is ast.Name:
+                if base.id in _ENUM_BASES:
+                    return True
+            elif kind is ast.Attribute:
+                if base.attr in _ENUM_BASES:
+                    return True
         return False
 
     @staticmethod
@@ -89,14 +147,15 @@ class AstUtils:
     ) -> tuple[Literal["instance", "class", "static"], list[str]]:
         kind: Literal["instance", "class", "static"] = "instance"
         decorator_names: list[str] = []
+        if not decorators:
+            return kind, decorator_names
 
         for deco in decorators:
-            if isinstance(deco, ast.Call):
-                deco_node = deco.func
-            else:
-                deco_node = deco
+            if type(deco) is ast.Call:
+                deco = deco.func
 
-            name = AstUtils.unparse_node(cast(ast.expr, deco_node))
+            # Bare names (@property, @staticmethod) need no unparsing
+            name = deco.id if type(deco) is ast.Name else AstUtils.unparse_node(deco)
             if name:
                 decorator_names.append(name)
                 if name.endswith("staticmethod"):
@@ -104,4 +163,5 @@ class AstUtils:
                 elif name.endswith("classmethod"):
                     kind = "class"
 
-        return kind, sorted(decorator_names)
+        decorator_names.sort()
+        return kind, decorator_names
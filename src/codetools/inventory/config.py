@@ -3,8 +3,6 @@ import os
 from pathlib import Path
 from typing import Any
 
-import commentjson  # type: ignore
-
 
 class ConfigurationManager:
     """
@@ -48,6 +46,9 @@ class ConfigurationManager:
     def _merge_user_file(self, config: dict[str, Any], path: Path) -> None:
         if not path.is_file():
             raise FileNotFoundError(f"Config file not found: {path}")
+        # Imported lazily: commentjson builds a lark parser at import time.
+        import commentjson  # type: ignore
+
         try:
             with open(path, "r", encoding="utf-8") as f:
                 user_conf = commentjson.load(f)
@@ -3,12 +3,16 @@ from __future__ import annotations
 import ast
 import concurrent.futures
 import datetime
-import tomllib
+import functools
+import json
+import operator
+import os
+import re
+import stat
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Callable, Literal
 
 import pathspec
-import yaml
 
 from codetools.annotate.path_annotate import PathHeaderAnnotator
 
@@ -16,6 +20,80 @@ from . import models
 from .ast_ops import AstUtils
 
 
+def _no_underscore_const(name: str) -> bool:
+    return name[:1] != "_"
+
+
+def _uppercase_const(name: str) -> bool:
+    # Identifiers are letters, digits and "_", so for ASCII names isupper()
+    # means [A-Z0-9_]* with at least one letter, all upper case.
+    return name[:1] != "_" and name.isascii() and name.isupper()
+
+
+# Name filters for each `constant_visibility` strategy
+_CONST_NAME_MATCHERS: dict[str, Callable[[str], bool]] = {
+    "no_underscore": _no_underscore_const,
+    "uppercase": _uppercase_const,
+}
+
+# Matches named-group openers in pathspec's generated regexes
+_REGEX_GROUP_NAME = re.compile(r"\(\?P<\w+>")
+
+# Top-level (column 0) class/def statements; "\r" covers old Mac line endings
+# and "\A\xef\xbb\xbf" a UTF-8 BOM at the start of the file.
+_TOP_LEVEL_DEF = re.compile(
+    rb"(?:^|\r|\A\xef\xbb\xbf)\f*(?:class|def|async)\b", re.MULTILINE
+).search
+
+# Modules whose leading comment block has this line are listed but not parsed
+_SKIP_PRAGMA = b"# api-inventory: skip"
+
+# Non-empty lines, lazily; "\r" alone ends a line in old Mac files
+_SOURCE_LINES = re.compile(rb"[^\r\n]+").finditer
+
+# Leading slice of pyproject.toml tried before parsing the whole file
+_PYPROJECT_HEAD_CHARS = 64 * 1024
+
+# Below this many modules, parse in-process rather than spawning workers.
+_INLINE_PARSE_MAX_MODULES = 32
+
+# Per-process worker state, set once by the pool initializer so tasks only
+# carry module paths instead of re-pickling the config with every submission.
+_WORKER_STATE: dict[str, Any] = {}
+
+
+def _init_worker(config: dict[str, Any]) -> None:
+    _WORKER_STATE["config"] = config
+
+
+def _parse_task(task: tuple[str, str, str]) -> tuple[str, models.ModuleRecord | str]:
+    file_path, rel, qname = task
+    return ModuleParser.parse_file(file_path, rel, qname, _WORKER_STATE["config"])
+
+
+_BY_NAME = operator.itemgetter("name")
+
+
+def _sort_by_name(records: list[Any]) -> list[Any]:
+    # Siblings share a parent qname, so name order is also qname order.
+    # Sorts in place; most of these lists are empty or single-element.
+    if len(records) > 1:
+        records.sort(key=_BY_NAME)
+    return records
+
+
+def _no_docstring(node: Any) -> None:
+    return None
+
+
+def _any_visibility(name: str) -> bool:
+    return True
+
+
+def _module_qname(rel: str) -> str:
+    return rel.lstrip("/").replace(".py", "").replace("/__init__", "").replace("/", ".")
+
+
 class InventoryService:
     """
     Core service for analyzing Python repositories and generating API inventories.
@@ -31,8 +109,29 @@ class InventoryService:
         self._root = root_path
 
         # Dependencies
-        self._path_matcher = self._init_path_matcher()
+        self._is_excluded = self._init_path_matcher()
+        # Excluded directories are pruned during the walk, unless a negated
+        # pattern could re-include something below them.
+        self._prune_dirs = not any(
+            p.lstrip().startswith("!") for p in self._app_config.get("exclude") or []
+        )
         self._concurrency = max(1, self._app_config.get("concurrency", 1))
+        # Worker pool is created lazily and reused across runs until close()
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> InventoryService:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shuts down the worker pool, if one was started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
     def run_inventory(self) -> models.InventoryReport:
         """
@@ -65,29 +164,88 @@ class InventoryService:
 
         return self._build_report(start_time, stats, packages, pkg_name, pkg_version)
 
+    def write_report(self, report: models.InventoryReport, path: str) -> None:
+        """
+        Writes the report in the configured `output_format` (yaml or json).
+        """
+        output_format = self._app_config.get("output_format", "yaml")
+        if output_format == "json":
+            self.write_json(report, path)
+        elif output_format == "yaml":
+            self.write_yaml(report, path)
+        else:
+            raise ValueError(
+                f"Unsupported output_format {output_format!r} "
+                "(expected 'yaml' or 'json')"
+            )
+
+    def write_json(self, report: models.InventoryReport, path: str) -> None:
+        """
+        Writes the report to a JSON file.
+        """
+        out_p = Path(path)
+        out_p.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(out_p, "w", encoding="utf-8") as f:
+            # ASCII escapes keep lone surrogates (valid in Python strings, not
+            # encodable as UTF-8) as "\ud800" instead of failing mid-write.
+            json.dump(report, f, indent=2, ensure_ascii=True)
+            f.write("\n")
+
+        print(f"Inventory written to: {out_p.resolve()}")
+
     def write_yaml(self, report: models.InventoryReport, path: str) -> None:
         """
         Writes the report to a YAML file.
         """
         data = dict(report)
+        packages = data.pop("packages", [])
         out_p = Path(path)
         out_p.parent.mkdir(parents=True, exist_ok=True)
 
         with open(out_p, "w", encoding="utf-8") as f:
-            self._yaml_dump_no_alias(data, f)
+            # Header first, then one package per dump: the YAML node graph only
+            # ever holds a single package instead of the whole report.
+            f.write(self._yaml_dump_no_alias(data))
+            if not packages:
+                f.write(self._yaml_dump_no_alias({"packages": []}))
+            else:
+                f.write("packages:\n")
+                for pkg in packages:
+                    # The emitter may close each chunk with a "..." document end
+                    # marker (e.g. after a keep-chomped scalar); drop it so the
+                    # file stays one document.
+                    chunk = self._yaml_dump_no_alias([pkg])
+                    f.write(chunk.removesuffix("...\n"))
 
         print(f"Inventory written to: {out_p.resolve()}")
 
     # --- Private Helpers ---
 
-    def _init_path_matcher(self) -> pathspec.PathSpec | None:
+    def _init_path_matcher(self) -> Callable[[str], Any] | None:
         patterns = self._app_config.get("exclude")
-        if patterns:
-            try:
-                return pathspec.PathSpec.from_lines("gitwildmatch", patterns)
-            except Exception as e:
-                print(f"WARNING: Invalid exclude patterns: {e}")
-        return None
+        if not patterns:
+            return None
+        try:
+            spec = pathspec.PathSpec.from_lines("gitwildmatch", patterns)
+        except Exception as e:
+            print(f"WARNING: Invalid exclude patterns: {e}")
+            return None
+
+        rules = [p for p in spec.patterns if p.include is not None]
+        if not rules:
+            return None
+        if not all(p.include for p in rules):
+            # Negations make the result order-dependent (last match wins)
+            return spec.match_file
+
+        # Union every pattern into one alternation: one regex call per path
+        # instead of one per pattern. Group names are dropped so they can't clash.
+        return re.compile(
+            "|".join(
+                f"(?:{_REGEX_GROUP_NAME.sub('(?:', p.regex.pattern)})" for p in rules
+            )
+        ).match
 
     def _init_stats(
         self, files: int, excluded: int, pkgs: int, mods: int
@@ -109,60 +267,76 @@ class InventoryService:
     def _collect_files(self) -> tuple[list[Path], int]:
         all_py: list[Path] = []
         excluded = 0
-        try:
-            for f in self._root.rglob("*.py"):
-                if not f.is_file() or f.is_symlink():
-                    continue
-                try:
-                    rel = f.relative_to(self._root).as_posix()
-                    if self._path_matcher and self._path_matcher.match_file(rel):
-                        excluded += 1
-                        continue
-                    all_py.append(f)
-                except ValueError:
-                    continue
-        except PermissionError as e:
-            print(f"ERROR: Permission denied: {e}")
+        is_excluded = self._is_excluded
+        prune = is_excluded is not None and self._prune_dirs
+
+        # os.scandir answers file-type checks from cached directory entries,
+        # so no extra stat()/lstat() per candidate. Symlinks are not followed.
+        # Excluded directories (.venv, node_modules, ...) are never entered, so
+        # files_excluded only counts .py files excluded individually.
+        stack = [(os.fspath(self._root), "")]
+        while stack:
+            dir_path, dir_rel = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        rel = dir_rel + entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            rel += "/"
+                            if prune and is_excluded(rel):
+                                continue
+                            stack.append((entry.path, rel))
+                        elif entry.name.endswith(".py") and entry.is_file(
+                            follow_symlinks=False
+                        ):
+                            if is_excluded and is_excluded(rel):
+                                excluded += 1
+                                continue
+                            all_py.append(Path(entry.path))
+            except PermissionError as e:
+                print(f"ERROR: Permission denied: {e}")
 
         return sorted(all_py), excluded
 
     def _build_package_tree(self, files: list[Path]) -> list[models.PackageRecord]:
-        pkg_dirs: set[Path] = {p.parent for p in files}
-        if self._app_config.get("package_mode") == "require_init_py":
-            pkg_dirs = {p.parent for p in files if p.name == "__init__.py"}
+        require_init = self._app_config.get("package_mode") == "require_init_py"
 
-        packages_map: dict[str, models.PackageRecord] = {}
-
-        for p_dir in sorted(list(pkg_dirs)):
-            rel = self._normalize_rel(p_dir)
-            qname = rel.lstrip("/").replace("/", ".")
-            packages_map[rel] = models.PackageRecord(
-                path=rel, qname=qname, is_package=True, modules=[]
-            )
+        packages_map: dict[Path, models.PackageRecord] = {}
+        init_dirs: set[Path] = set()
 
+        # Single pass: one relpath per file; the package relpath is its head.
         for f in files:
-            p_rel = self._normalize_rel(f.parent)
-            if p_rel in packages_map:
-                m_rel = self._normalize_rel(f)
-                m_qname = (
-                    m_rel.lstrip("/")
-                    .replace(".py", "")
-                    .replace("/__init__", "")
-                    .replace("/", ".")
+            p_dir = f.parent
+            m_rel = self._normalize_rel(f)
+
+            pkg = packages_map.get(p_dir)
+            if pkg is None:
+                head = m_rel.rpartition("/")[0]
+                rel = head if head.lstrip("/") else self._normalize_rel(p_dir)
+                qname = rel.lstrip("/").replace("/", ".")
+                pkg = packages_map[p_dir] = models.PackageRecord(
+                    path=rel, qname=qname, is_package=True, modules=[]
                 )
-                packages_map[p_rel]["modules"].append(
-                    models.ModuleRecord(
-                        path=m_rel,
-                        qname=m_qname,
-                        docstring=None,
-                        classes=[],
-                        functions=[],
-                        enums=[],
-                        constants=[],
-                    )
+
+            if f.name == "__init__.py":
+                init_dirs.add(p_dir)
+
+            pkg["modules"].append(
+                models.ModuleRecord(
+                    path=m_rel,
+                    qname=_module_qname(m_rel),
+                    classes=[],
+                    functions=[],
+                    enums=[],
+                    constants=[],
                 )
+            )
 
-        return list(packages_map.values())
+        return [
+            packages_map[p_dir]
+            for p_dir in sorted(packages_map)
+            if not require_init or p_dir in init_dirs
+        ]
 
     def _process_modules(
         self,
@@ -171,74 +345,106 @@ class InventoryService:
         stats: models.InventoryStats,
     ) -> None:
 
-        parsed_results: dict[str, models.ModuleRecord | str] = {}
-
-        with concurrent.futures.ProcessPoolExecutor(
-            max_workers=self._concurrency
-        ) as executor:
-            futures = {
-                executor.submit(
-                    ModuleParser.parse_file,
-                    self._root / m["path"].lstrip("/"),
-                    self._app_config,
-                    self._root,
-                ): m["qname"]
-                for m in all_modules
-            }
+        # Spawning a process pool costs more than parsing a handful of modules.
+        if self._concurrency == 1 or len(all_modules) < _INLINE_PARSE_MAX_MODULES:
+            parsed_results = self._parse_inline(all_modules)
+        else:
+            parsed_results = self._parse_in_pool(all_modules)
 
-            for future in concurrent.futures.as_completed(futures):
-                qname = futures[future]
-                try:
-                    _, result = future.result()
-                    parsed_results[qname] = result
-                except Exception as e:
-                    parsed_results[qname] = f"Process Error: {e}"
-
-        # Merge results
+        # Merge results; stats are tallied once over all parsed modules
+        parsed_ok: list[models.ModuleRecord] = []
         for pkg in packages:
             processed_mods: list[models.ModuleRecord] = []
             for skeleton in pkg["modules"]:
                 res = parsed_results.get(skeleton["qname"])
                 if isinstance(res, dict):
-                    stats["files_parsed_ok"] += 1
-                    self._update_stats(stats, res)
                     processed_mods.append(res)
                 else:
                     stats["files_parse_errors"] += 1
                     print(f"WARNING: Failed {skeleton['path']}: {res}")
 
+            parsed_ok += processed_mods
             pkg["modules"] = sorted(processed_mods, key=lambda m: m["qname"])
 
+        self._update_stats(stats, parsed_ok)
+
+    def _parse_inline(
+        self, all_modules: list[models.ModuleRecord]
+    ) -> dict[str, models.ModuleRecord | str]:
+        parsed_results: dict[str, models.ModuleRecord | str] = {}
+        root = os.fspath(self._root)
+        for m in all_modules:
+            _, parsed_results[m["qname"]] = ModuleParser.parse_file(
+                os.path.join(root, m["path"].lstrip("/")),
+                m["path"],
+                m["qname"],
+                self._app_config,
+            )
+        return parsed_results
+
+    def _parse_in_pool(
+        self, all_modules: list[models.ModuleRecord]
+    ) -> dict[str, models.ModuleRecord | str]:
+        parsed_results: dict[str, models.ModuleRecord | str] = {}
+
+        # Several chunks per worker keeps the load balanced while paying
+        # pickling/IPC once per chunk instead of once per module.
+        size = max(1, len(all_modules) // (self._concurrency * 4))
+        # Plain strings are cheaper to build and pickle than Path objects.
+        root = os.fspath(self._root)
+        tasks = [
+            (os.path.join(root, m["path"].lstrip("/")), m["path"], m["qname"])
+            for m in all_modules
+        ]
+
+        # Parse failures come back as strings; only pool-level failures raise.
+        try:
+            results = self._get_executor().map(_parse_task, tasks, chunksize=size)
+            for m, (_, result) in zip(all_modules, results):
+                parsed_results[m["qname"]] = result
+        except Exception as e:
+            for m in all_modules:
+                parsed_results.setdefault(m["qname"], f"Process Error: {e}")
+            # A broken pool cannot be reused; the next run starts a fresh one.
+            if isinstance(e, concurrent.futures.BrokenExecutor):
+                self.close()
+
+        return parsed_results
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        # Config is fixed per service, so the initializer state
+        # stays valid for the lifetime of the pool.
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._concurrency,
+                initializer=_init_worker,
+                initargs=(self._app_config,),
+            )
+        return self._executor
+
     def _update_stats(
-        self, stats: models.InventoryStats, mod: models.ModuleRecord
+        self, stats: models.InventoryStats, mods: list[models.ModuleRecord]
     ) -> None:
-        stats["constants"] += len(mod.get("constants", []))
-        stats["enums"] += len(mod.get("enums", []))
-        stats["functions"] += len(mod.get("functions", []))
-        stats["classes"] += len(mod["classes"])
-        for c in mod["classes"]:
-            stats["constants"] += len(c.get("constants", []))
-            stats["methods"] += len(c["methods"])
+        classes = [c for m in mods for c in m["classes"]]
+        stats["files_parsed_ok"] += len(mods)
+        stats["classes"] += len(classes)
+        stats["methods"] += sum(map(len, [c["methods"] for c in classes]))
+        stats["constants"] += sum(map(len, [m.get("constants", ()) for m in mods]))
+        stats["constants"] += sum(map(len, [c.get("constants", ()) for c in classes]))
+        stats["enums"] += sum(map(len, [m.get("enums", ()) for m in mods]))
+        stats["functions"] += sum(map(len, [m.get("functions", ()) for m in mods]))
 
     def _read_pyproject(self, path: str | None) -> tuple[str | None, str | None]:
         if not path:
             return None, None
-        p_path = Path(path)
-        if not p_path.is_file():
-            return None, None
         try:
-            with open(p_path, "rb") as f:
-                data = tomllib.load(f)
-
-            if "project" in data:
-                return data["project"].get("name"), data["project"].get("version")
-            if "tool" in data and "poetry" in data["tool"]:
-                return data["tool"]["poetry"].get("name"), data["tool"]["poetry"].get(
-                    "version"
-                )
-        except Exception:
-            pass
-        return None, None
+            st = os.stat(path)
+        except OSError:
+            return None, None
+        if not stat.S_ISREG(st.st_mode):
+            return None, None
+        # Keyed on mtime, so repeated runs sharing a pyproject parse it once
+        return _read_pyproject_meta(os.path.abspath(path), st.st_mtime_ns)
 
     def _normalize_rel(self, path: Path) -> str:
         rel = PathHeaderAnnotator.normalize_relpath(self._root, path)
@@ -266,20 +472,87 @@ class InventoryService:
         )
         return models.InventoryReport(meta=meta, stats=stats, packages=pkgs)
 
-    def _yaml_dump_no_alias(self, data: Any, stream: Any) -> None:
-        class MultilineDumper(yaml.SafeDumper):
-            def represent_scalar(self, tag, value, style=None):
-                if isinstance(value, str) and "\n" in value:
-                    style = "|"
-                return super().represent_scalar(tag, value, style)
+    def _yaml_dump_no_alias(self, data: Any) -> str:
+        import yaml
 
-        class NoAliasDumper(MultilineDumper):
-            def ignore_aliases(self, data):
-                return True
+        try:
+            return yaml.dump(
+                data, Dumper=_yaml_dumper(), sort_keys=False, allow_unicode=True
+            )
+        except UnicodeEncodeError:
+            # libyaml can't emit lone surrogates (valid in Python str literals);
+            # the pure-Python emitter escapes them as "\uD800". Only the chunk
+            # is re-dumped, so nothing partial has reached the file yet.
+            return yaml.dump(
+                data,
+                Dumper=_yaml_dumper(c_emitter=False),
+                sort_keys=False,
+                allow_unicode=True,
+            )
 
-        yaml.dump(
-            data, stream, Dumper=NoAliasDumper, sort_keys=False, allow_unicode=True
-        )
+
+@functools.cache
+def _yaml_dumper(c_emitter: bool = True) -> type:
+    """
+    Builds the report dumper on first use, so PyYAML is only imported when a
+    YAML report is actually written. Uses libyaml's CSafeDumper if available
+    and `c_emitter` is set, otherwise the pure-Python SafeDumper.
+    """
+    import yaml
+
+    base = yaml.SafeDumper
+    if c_emitter:
+        base = getattr(yaml, "CSafeDumper", base)
+
+    class MultilineDumper(base):
+        # Only str values can be multiline; keys, numbers and bools never are.
+        def represent_str(self, data):
+            if "\n" in data:
+                return self.represent_scalar("tag:yaml.org,2002:str", data, style="|")
+            return super().represent_str(data)
+
+    MultilineDumper.add_representer(str, MultilineDumper.represent_str)
+
+    class NoAliasDumper(MultilineDumper):
+        def ignore_aliases(self, data):
+            return True
+
+    return NoAliasDumper
+
+
+@functools.lru_cache(maxsize=32)
+def _read_pyproject_meta(path: str, mtime_ns: int) -> tuple[str | None, str | None]:
+    import tomllib
+
+    def name_version(data: dict[str, Any]) -> tuple[str | None, str | None]:
+        if "project" in data:
+            return data["project"].get("name"), data["project"].get("version")
+        if "tool" in data and "poetry" in data["tool"]:
+            return data["tool"]["poetry"].get("name"), data["tool"]["poetry"].get(
+                "version"
+            )
+        return None, None
+
+    try:
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8")
+
+        # [project] usually comes first: try parsing only the head, cut just
+        # before a table header. [project] wins over [tool.poetry] and its keys
+        # are contiguous, so a project name in the head is final. A head with
+        # only [project.urls] or the like proves nothing; parse everything.
+        cut = text.rfind("\n[", 0, _PYPROJECT_HEAD_CHARS)
+        if len(text) > _PYPROJECT_HEAD_CHARS and cut > 0:
+            try:
+                head = tomllib.loads(text[:cut])
+                if "name" in head.get("project", {}):
+                    return name_version(head)
+            except tomllib.TOMLDecodeError:
+                pass
+
+        return name_version(tomllib.loads(text))
+    except Exception:
+        return None, None
 
 
 class ModuleParser:
@@ -289,26 +562,39 @@ class ModuleParser:
 
     @staticmethod
     def parse_file(
-        file_path: Path, config: dict[str, Any], root: Path
+        file_path: str, rel: str, qname: str, config: dict[str, Any]
     ) -> tuple[str, models.ModuleRecord | str]:
-
+        # rel/qname come from the package tree; no need to re-derive them here
         try:
-            # Re-calculate qname inside worker
-            rel = PathHeaderAnnotator.normalize_relpath(root, file_path)
-            if config.get("leading_slash_in_paths"):
-                rel = f"/{rel}"
-            qname = (
-                rel.lstrip("/")
-                .replace(".py", "")
-                .replace("/__init__", "")
-                .replace("/", ".")
-            )
-        except Exception as e:
-            return str(file_path), f"Path Error: {e}"
+            with open(file_path, "rb") as f:
+                source = f.read()
 
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read(), filename=str(file_path))
+            # Opt-out pragma: record the module but don't parse it
+            if ModuleParser._has_skip_pragma(source):
+                return qname, ModuleParser._build_record(
+                    rel, qname, config, None, ([], [], [], [])
+                )
+
+            # Without constants/docstrings, only top-level class/def statements
+            # produce records; skip parsing modules that have none.
+            if not (
+                config.get("include_constants")
+                or config.get("include_docstrings")
+                or _TOP_LEVEL_DEF(source)
+            ):
+                return qname, ModuleParser._build_record(
+                    rel, qname, config, None, ([], [], [], [])
+                )
+
+            # compile() decodes bytes itself, honouring PEP 263 cookies.
+            # Same as ast.parse() minus the wrapper call; no type comments.
+            tree = compile(
+                source,
+                file_path,
+                "exec",
+                flags=ast.PyCF_ONLY_AST,
+                dont_inherit=True,
+            )
 
             mod_doc = (
                 AstUtils.get_docstring(tree, config.get("strip_docstrings", False))
@@ -317,225 +603,271 @@ class ModuleParser:
             )
 
             # Extract Nodes
-            constants, enums, functions, classes = NodeExtractor(config, qname).extract(
-                tree.body, "module"
-            )
-
-            record = models.ModuleRecord(
-                path=rel,
-                qname=qname,
-                docstring=mod_doc,
-                constants=constants,
-                enums=enums,
-                functions=functions,
-                classes=classes,
-            )
-
-            # Prune empty optionals
-            if not mod_doc:
-                record.pop("docstring", None)
-            if not config.get("include_constants"):
-                record.pop("constants", None)
-            if not config.get("include_enums"):
-                record.pop("enums", None)
-            if not config.get("include_functions"):
-                record.pop("functions", None)
-
-            return qname, record
+            nodes = NodeExtractor(config, qname).extract(tree.body)
+            return qname, ModuleParser._build_record(rel, qname, config, mod_doc, nodes)
         except Exception as e:
             return qname, f"Parse Error: {e}"
 
+    @staticmethod
+    def _has_skip_pragma(source: bytes) -> bool:
+        """
+        True if the leading comment block (e.g. after a shebang or path
+        header) contains a `# api-inventory: skip` line.
+        """
+        # Stops at the first code line, so no byte cap is needed
+        for m in _SOURCE_LINES(source):
+            line = m.group().strip().removeprefix(b"\xef\xbb\xbf")
+            if not line:
+                continue
+            if not line.startswith(b"#"):
+                return False
+            if line == _SKIP_PRAGMA:
+                return True
+        return False
+
+    @staticmethod
+    def _build_record(
+        rel: str,
+        qname: str,
+        config: dict[str, Any],
+        mod_doc: str | None,
+        nodes: tuple[list, list, list, list],
+    ) -> models.ModuleRecord:
+        constants, enums, functions, classes = nodes
+
+        # Optional sections are only added when enabled/non-empty
+        record: models.ModuleRecord = {"path": rel, "qname": qname}
+        if mod_doc:
+            record["docstring"] = mod_doc
+        if config.get("include_constants"):
+            record["constants"] = constants
+        if config.get("include_enums"):
+            record["enums"] = enums
+        if config.get("include_functions"):
+            record["functions"] = functions
+        record["classes"] = classes
+
+        return record
+
 
 class NodeExtractor:
-    # (Same as before, no changes needed here)
+    """
+    Builds inventory records from the top-level statements of a module.
+    """
+
     def __init__(self, config: dict[str, Any], parent_qname: str) -> None:
         self.config = config
         self.parent_qname = parent_qname
-
-    def extract(self, nodes: list[ast.stmt], scope: Literal["module", "class"]):
+        self._const_name_ok = _CONST_NAME_MATCHERS.get(
+            config.get("constant_visibility", "no_underscore")
+        )
+        # Resolved once per extractor rather than per AST node
+        self._include_constants = config.get("include_constants")
+        self._include_functions = config.get("include_functions")
+        self._include_enums = config.get("include_enums")
+        self._public_only = config.get("public_only")
+        self._include_docstrings = config.get("include_docstrings")
+        self._strip_docstrings = config.get("strip_docstrings", False)
+        if not self._include_docstrings:
+            self._doc = _no_docstring
+        if not self._public_only:
+            self._vis = _any_visibility
+
+    def extract(self, nodes: list[ast.stmt]):
         consts: list[models.ConstantRecord] = []
         enums: list[models.EnumRecord] = []
         funcs: list[models.FunctionRecord] = []
         clss: list[models.ClassRecord] = []
+        add_const, add_enum = consts.append, enums.append
+        add_func, add_class = funcs.append, clss.append
 
+        # AST node classes are leaves, so exact type checks are safe and
+        # cheaper than isinstance() walking the MRO for every statement.
         for node in nodes:
-            if self.config.get("include_constants") and isinstance(
-                node, (ast.Assign, ast.AnnAssign)
-            ):
-                if (t := getattr(node, "target", None)) and isinstance(t, ast.Name):
-                    if c := self._const(node, scope, t):
-                        consts.append(c)
-
-            elif (
-                self.config.get("include_functions")
-                and isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
-                and scope == "module"
-            ):
-                if self._vis(node.name):
-                    funcs.append(self._func(node))
+            kind = type(node)
+            if kind is ast.Assign or kind is ast.AnnAssign:
+                if self._include_constants and (c := self._const(node, "module")):
+                    add_const(c)
+
+            elif kind is ast.FunctionDef or kind is ast.AsyncFunctionDef:
+                if self._include_functions and self._vis(node.name):
+                    add_func(self._func(node))
 
-            elif isinstance(node, ast.ClassDef):
+            elif kind is ast.ClassDef:
                 if self._vis(node.name):
                     fq = f"{self.parent_qname}.{node.name}"
-                    if self.config.get("include_enums") and AstUtils.is_enum(node):
-                        enums.append(self._enum(node, fq))
+                    if self._include_enums and AstUtils.is_enum(node):
+                        add_enum(self._enum(node, fq))
                     else:
-                        clss.append(self._class(node, fq))
+                        add_class(self._class(node, fq))
 
         return (
-            sorted(consts, key=lambda x: x["name"]),
-            sorted(enums, key=lambda x: x["qname"]),
-            sorted(funcs, key=lambda x: x["qname"]),
-            sorted(clss, key=lambda x: x["qname"]),
+            _sort_by_name(consts),
+            _sort_by_name(enums),
+            _sort_by_name(funcs),
+            _sort_by_name(clss),
         )
 
+    # _doc/_vis assume their feature is on; __init__ swaps in no-op
+    # versions when it isn't, so the flags aren't re-checked per node.
+    def _doc(self, node: Any) -> str | None:
+        return AstUtils.get_docstring(node, self._strip_docstrings)
+
     def _vis(self, name: str) -> bool:
-        return (
-            not self.config.get("public_only")
-            or AstUtils.get_visibility(name) == "public"
-        )
+        return AstUtils.get_visibility(name) == "public"
 
     def _const(
-        self, node: Any, scope: str, target: ast.Name
+        self, node: Any, scope: Literal["module", "class"]
     ) -> models.ConstantRecord | None:
+        target = AstUtils.get_assign_name(node)
+        if target is None:
+            return None
         name = target.id
-        vis = AstUtils.get_visibility(name)
-        st = self.config.get("constant_visibility", "no_underscore")
-
-        if st == "uppercase":
-            if not (
-                name.isupper()
-                and AstUtils.re.match(r"^[A-Z0-9_]+$", name)
-                and vis == "public"
-            ):
-                return None
-        elif st == "no_underscore" and vis != "public":
+        if self._const_name_ok and not self._const_name_ok(name):
             return None
+        vis = AstUtils.get_visibility(name)
 
-        v, vr = AstUtils.extract_literal_value(getattr(node, "value", None))
-        r = models.ConstantRecord(name=name, visibility=vis, scope=scope, value=v, value_repr=vr)  # type: ignore
-        if v is None:
-            r.pop("value", None)
+        v, vr = AstUtils.extract_literal_value(node.value)
+        r: models.ConstantRecord = {"name": name, "visibility": vis, "scope": scope}
+        if v is not None:
+            r["value"] = v
+        r["value_repr"] = vr
         return r
 
     def _func(self, node: Any) -> models.FunctionRecord:
         q = f"{self.parent_qname}.{node.name}"
         _, d = AstUtils.get_decorator_kind(node.decorator_list)
         s = self._sig(node.args, node.returns)
-        doc = AstUtils.get_docstring(node, self.config.get("strip_docstrings", False))
-        r = models.FunctionRecord(
-            name=node.name,
-            qname=q,
-            visibility=AstUtils.get_visibility(node.name),
-            decorators=d,
-            signature=s,
-            docstring=doc,
-        )
-        if not doc:
-            r.pop("docstring", None)
+        doc = self._doc(node)
+        r: models.FunctionRecord = {
+            "name": node.name,
+            "qname": q,
+            "visibility": AstUtils.get_visibility(node.name),
+            "decorators": d,
+            "signature": s,
+        }
+        if doc:
+            r["docstring"] = doc
         return r
 
     def _class(self, node: ast.ClassDef, qname: str) -> models.ClassRecord:
-        doc = AstUtils.get_docstring(node, self.config.get("strip_docstrings", False))
-        sub = NodeExtractor(self.config, qname)
-        consts, _, _, _ = sub.extract(node.body, "class")
+        doc = self._doc(node)
+        consts, methods = self._class_members(node.body, qname)
+        r: models.ClassRecord = {"name": node.name, "qname": qname}
+        if doc:
+            r["docstring"] = doc
+        if self._include_constants:
+            r["constants"] = _sort_by_name(consts)
+        r["methods"] = _sort_by_name(methods)
+        return r
 
+    def _class_members(
+        self, body: list[ast.stmt], qname: str
+    ) -> tuple[list[models.ConstantRecord], list[models.MethodRecord]]:
+        # One pass over the class body; nested classes aren't reported.
+        consts: list[models.ConstantRecord] = []
         methods: list[models.MethodRecord] = []
-        for i in node.body:
-            if isinstance(i, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        add_const, add_method = consts.append, methods.append
+
+        for i in body:
+            kind = type(i)
+            if kind is ast.FunctionDef or kind is ast.AsyncFunctionDef:
                 if i.name == "__init__" or self._vis(i.name):
-                    methods.append(sub._method(i, qname))
-
-        r = models.ClassRecord(
-            name=node.name,
-            qname=qname,
-            docstring=doc,
-            constants=consts,
-            methods=sorted(methods, key=lambda x: x["name"]),
-        )
-        if not doc:
-            r.pop("docstring", None)
-        if not self.config.get("include_constants"):
-            r.pop("constants", None)
-        return r
+                    add_method(self._method(i, qname))
+            elif self._include_constants and (
+                kind is ast.Assign or kind is ast.AnnAssign
+            ):
+                if c := self._const(i, "class"):
+                    add_const(c)
+
+        return consts, methods
 
     def _enum(self, node: ast.ClassDef, qname: str) -> models.EnumRecord:
-        doc = AstUtils.get_docstring(node, self.config.get("strip_docstrings", False))
-        mems = []
+        doc = self._doc(node)
+        mems: list[models.EnumMemberRecord] = []
         for i in node.body:
             if (
-                isinstance(i, (ast.Assign, ast.AnnAssign))
-                and (t := getattr(i, "target", None))
-                and isinstance(t, ast.Name)
+                (type(i) is ast.Assign or type(i) is ast.AnnAssign)
+                and (t := AstUtils.get_assign_name(i))
+                and not t.id.startswith("_")
             ):
-                if not t.id.startswith("_"):
-                    _, vr = AstUtils.extract_literal_value(getattr(i, "value", None))
-                    mems.append(models.EnumMemberRecord(name=t.id, value_repr=vr))
-        r = models.EnumRecord(
-            name=node.name,
-            qname=qname,
-            docstring=doc,
-            members=sorted(mems, key=lambda x: x["name"]),
-        )
-        if not doc:
-            r.pop("docstring", None)
+                _, vr = AstUtils.extract_literal_value(i.value)
+                mems.append({"name": t.id, "value_repr": vr})
+        r: models.EnumRecord = {"name": node.name, "qname": qname}
+        if doc:
+            r["docstring"] = doc
+        r["members"] = _sort_by_name(mems)
         return r
 
     def _method(self, node: Any, cq: str) -> models.MethodRecord:
         k, d = AstUtils.get_decorator_kind(node.decorator_list)
         if node.name == "__init__":
             k = "instance"
-        doc = AstUtils.get_docstring(node, self.config.get("strip_docstrings", False))
-        r = models.MethodRecord(
-            name=node.name,
-            qname=f"{cq}.{node.name}",
-            visibility=AstUtils.get_visibility(node.name),
-            kind=k,
-            decorators=d,
-            signature=self._sig(node.args, node.returns),
-            docstring=doc,
-        )
-        if not doc:
-            r.pop("docstring", None)
+        doc = self._doc(node)
+        r: models.MethodRecord = {
+            "name": node.name,
+            "qname": f"{cq}.{node.name}",
+            "visibility": AstUtils.get_visibility(node.name),
+            "kind": k,
+            "decorators": d,
+            "signature": self._sig(node.args, node.returns),
+        }
+        if doc:
+            r["docstring"] = doc
         return r
 
     def _sig(
         self, args: ast.arguments, returns: ast.expr | None
     ) -> models.FunctionSignature:
-        ps: list[models.Param] = []
-
-        def add(a, k, d=None):
+        u = AstUtils.unparse_node
+        defaults = args.defaults
+        off = len(args.args) - len(defaults)
+
+        # Params are plain dicts at runtime; literals skip the TypedDict call.
+        ps: list[models.Param] = [
+            {
+                "name": a.arg,
+                "kind": "positional_only",
+                "annotation": u(a.annotation),
+                "default": None,
+            }
+            for a in args.posonlyargs
+        ]
+        ps += [
+            {
+                "name": a.arg,
+                "kind": "positional_or_keyword",
+                "annotation": u(a.annotation),
+                "default": u(defaults[i - off]) if i >= off else None,
+            }
+            for i, a in enumerate(args.args)
+        ]
+        if a := args.vararg:
             ps.append(
-                models.Param(
-                    name=a.arg,
-                    kind=k,
-                    annotation=AstUtils.unparse_node(a.annotation),
-                    default=d,
-                )
+                {
+                    "name": a.arg,
+                    "kind": "var_positional",
+                    "annotation": u(a.annotation),
+                    "default": None,
+                }
             )
-
-        for a in args.posonlyargs:
-            add(a, "positional_only")
-
-        off = len(args.args) - len(args.defaults)
-        for i, a in enumerate(args.args):
-            d = AstUtils.unparse_node(args.defaults[i - off]) if i >= off else None
-            add(a, "positional_or_keyword", d)
-
-        if args.vararg:
-            add(args.vararg, "var_positional")
-
-        for i, a in enumerate(args.kwonlyargs):
-            d = (
-                AstUtils.unparse_node(args.kw_defaults[i])
-                if args.kw_defaults[i]
-                else None
+        ps += [
+            {
+                "name": a.arg,
+                "kind": "keyword_only",
+                "annotation": u(a.annotation),
+                "default": u(d),
+            }
+            for a, d in zip(args.kwonlyargs, args.kw_defaults)
+        ]
+        if a := args.kwarg:
+            ps.append(
+                {
+                    "name": a.arg,
+                    "kind": "var_keyword",
+                    "annotation": u(a.annotation),
+                    "default": None,
+                }
             )
-            add(a, "keyword_only", d)
 
-        if args.kwarg:
-            add(args.kwarg, "var_keyword")
-
-        return models.FunctionSignature(
-            params=ps, returns=AstUtils.unparse_node(returns)
-        )
+        return {"params": ps, "returns": u(returns)}
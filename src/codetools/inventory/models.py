@@ -1,4 +1,4 @@
-from typing import Any, Literal, TypedDict
+from typing import Any, Literal, NotRequired, TypedDict
 
 
 class Param(TypedDict):
@@ -23,7 +23,7 @@ class ConstantRecord(TypedDict):
     name: str
     visibility: Literal["public", "private", "dunder"]
     scope: Literal["module", "class"]
-    value: Any | None
+    value: NotRequired[Any]
     value_repr: str
 
 
@@ -35,7 +35,7 @@ class EnumMemberRecord(TypedDict):
 class EnumRecord(TypedDict):
     name: str
     qname: str
-    docstring: str | None
+    docstring: NotRequired[str]
     members: list[EnumMemberRecord]
 
 
@@ -46,7 +46,7 @@ class MethodRecord(TypedDict):
     kind: Literal["instance", "class", "static"]
     decorators: list[str]
     signature: FunctionSignature
-    docstring: str | None
+    docstring: NotRequired[str]
 
 
 class FunctionRecord(TypedDict):
@@ -55,24 +55,24 @@ class FunctionRecord(TypedDict):
     visibility: Literal["public", "private", "dunder"]
     decorators: list[str]
     signature: FunctionSignature
-    docstring: str | None
+    docstring: NotRequired[str]
 
 
 class ClassRecord(TypedDict):
     name: str
     qname: str
-    docstring: str | None
-    constants: list[ConstantRecord]
+    docstring: NotRequired[str]
+    constants: NotRequired[list[ConstantRecord]]
     methods: list[MethodRecord]
 
 
 class ModuleRecord(TypedDict):
     path: str
     qname: str
-    docstring: str | None
-    constants: list[ConstantRecord]
-    enums: list[EnumRecord]
-    functions: list[FunctionRecord]
+    docstring: NotRequired[str]
+    constants: NotRequired[list[ConstantRecord]]
+    enums: NotRequired[list[EnumRecord]]
+    functions: NotRequired[list[FunctionRecord]]
     classes: list[ClassRecord]
 
 
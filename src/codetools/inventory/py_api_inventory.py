@@ -1,7 +1,7 @@
 """
 py_api_inventory.py
 
-Traverses a Python repository and outputs a YAML inventory of the repository's 
+Traverses a Python repository and outputs a YAML inventory of the repository's
 API surface (packages, modules, classes, methods, constants, etc.) using
 static analysis via `ast`.
 
@@ -31,16 +31,16 @@ class CliInterface:
         try:
             config = self._build_config(args)
 
-            service = InventoryService(
+            with InventoryService(
                 app_config=config,
                 root_path=Path(args.root).resolve(strict=True),
-            )
+            ) as service:
+                report = service.run_inventory()
 
-            report = service.run_inventory()
-
-            # Determine output path (Default to 'api_signatures.yaml' if not provided)
-            output_path = args.output_path or "api_signatures.yaml"
-            service.write_yaml(report, output_path)
+            # Determine output path (Default to 'api_signatures.<format>' if not provided)
+            output_format = config.get("output_format", "yaml")
+            output_path = args.output_path or f"api_signatures.{output_format}"
+            service.write_report(report, output_path)
 
             if args.print_summary:
                 s = report["stats"]
@@ -65,6 +65,7 @@ class CliInterface:
             "leading_slash_in_paths": args.leading_slash_in_paths,
             "constant_visibility": args.constant_visibility,
             "strip_docstrings": args.strip_docstrings,
+            "output_format": args.output_format,
             "concurrency": args.concurrency,
             "exclude": args.excludes,
             "_pyproject_path": args.pyproject_path,
@@ -90,7 +91,13 @@ class CliInterface:
             "-o",
             "--output",
             dest="output_path",
-            help="Output YAML file path (default: api_signatures.yaml)",
+            help="Output file path (default: api_signatures.<format>)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["yaml", "json"],
+            dest="output_format",
+            help="Output format (default: yaml)",
         )
 
         # Toggles
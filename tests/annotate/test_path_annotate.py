@@ -0,0 +1,48 @@
+import logging
+from pathlib import Path
+
+from codetools.annotate.path_annotate import (
+    ConsoleManager,
+    PathHeaderAnnotator,
+    ResolvedConfig,
+    Signature,
+)
+
+
+def _annotator(root: Path) -> PathHeaderAnnotator:
+    sig = Signature.from_dict(
+        {
+            "name": "python",
+            "comment_prefix": "#",
+            "required_suffix": ".py",
+            "extensions": [".py"],
+        }
+    )
+    return PathHeaderAnnotator(
+        root=root,
+        config=ResolvedConfig(signatures=[sig]),
+        logger=ConsoleManager(level=logging.WARNING, no_color=True),
+        concurrency=1,
+    )
+
+
+def test_binary_file_is_skipped_untouched(tmp_path):
+    blob = b"\x00\x01\x02 not really python \xff\xfe" * 10
+    path = tmp_path / "data.py"
+    path.write_bytes(blob)
+
+    outcome = _annotator(tmp_path).process_file(path)
+
+    assert outcome.action == "skipped_no_match"
+    assert outcome.reason == "binary"
+    assert path.read_bytes() == blob
+
+
+def test_text_file_gets_header(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_bytes(b"x = 1\n")
+
+    outcome = _annotator(tmp_path).process_file(path)
+
+    assert outcome.action == "inserted"
+    assert path.read_bytes() == b"# mod.py\nx = 1\n"
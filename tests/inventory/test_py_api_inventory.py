@@ -1 +1,223 @@
-#
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from codetools.inventory.core import (
+    InventoryService,
+    ModuleParser,
+    _read_pyproject_meta,
+)
+
+
+def _parse(tmp_path: Path, source: str, **config):
+    path = tmp_path / "mod.py"
+    path.write_text(source, encoding="utf-8")
+    _, record = ModuleParser.parse_file(str(path), "/mod.py", "mod", config)
+    assert isinstance(record, dict), record
+    return record
+
+
+# --- Assignment targets ---
+
+
+def test_plain_and_annotated_assignments_are_constants(tmp_path):
+    record = _parse(tmp_path, "X = 1\nY: int = 2\n", include_constants=True)
+
+    assert [(c["name"], c["value"]) for c in record["constants"]] == [
+        ("X", 1),
+        ("Y", 2),
+    ]
+
+
+def test_unpacking_chained_and_attribute_targets_are_ignored(tmp_path):
+    source = "A, B = 1, 2\nC = D = 3\nobj.attr = 4\nitems[0] = 5\n"
+    record = _parse(tmp_path, source, include_constants=True)
+
+    assert record["constants"] == []
+
+
+def test_container_values_are_lists_of_scalars(tmp_path):
+    source = "T = (1, 'a')\nS = {3}\nM = [1, x]\nB = [b'x']\n"
+    record = _parse(tmp_path, source, include_constants=True)
+    consts = {c["name"]: c for c in record["constants"]}
+
+    assert consts["T"]["value"] == [1, "a"]
+    assert consts["S"]["value"] == [3]
+    assert "value" not in consts["M"]
+    assert consts["M"]["value_repr"] == "[1, x]"
+    assert "value" not in consts["B"]
+
+
+def test_class_constants_use_plain_assignments(tmp_path):
+    source = "class Config:\n    TIMEOUT = 30\n    RETRIES: int = 3\n"
+    record = _parse(tmp_path, source, include_constants=True)
+
+    (cls,) = record["classes"]
+    assert [c["name"] for c in cls["constants"]] == ["RETRIES", "TIMEOUT"]
+    assert {c["scope"] for c in cls["constants"]} == {"class"}
+
+
+def test_enum_members_include_plain_assignments(tmp_path):
+    source = (
+        "from enum import Enum, auto\n"
+        "class Color(Enum):\n"
+        "    RED = 1\n"
+        "    GREEN: int = 2\n"
+        "    BLUE = auto()\n"
+        "    _hidden = 4\n"
+        "    A, B = 5, 6\n"
+    )
+    record = _parse(tmp_path, source, include_enums=True)
+
+    (enum,) = record["enums"]
+    assert enum["members"] == [
+        {"name": "BLUE", "value_repr": "auto()"},
+        {"name": "GREEN", "value_repr": "2"},
+        {"name": "RED", "value_repr": "1"},
+    ]
+
+
+# --- Skip pragma ---
+
+
+def test_skip_pragma_after_long_header_skips_parsing(tmp_path):
+    header = "".join(f"# License line {i}\n" for i in range(60))
+    source = header + "# api-inventory: skip\nclass Generated:\n    pass\n"
+    assert len(header) > 512
+
+    record = _parse(tmp_path, source)
+
+    assert record["classes"] == []
+
+
+def test_skip_pragma_requires_exact_line(tmp_path):
+    source = "# api-inventory: skipped\nclass Kept:\n    pass\n"
+    record = _parse(tmp_path, source)
+
+    assert [c["name"] for c in record["classes"]] == ["Kept"]
+
+
+def test_skip_pragma_after_code_is_ignored(tmp_path):
+    source = "class Kept:\n    pass\n# api-inventory: skip\n"
+    record = _parse(tmp_path, source)
+
+    assert [c["name"] for c in record["classes"]] == ["Kept"]
+
+
+# --- Report output ---
+
+
+def _run_inventory(tmp_path: Path, **config):
+    src = tmp_path / "src" / "pkg"
+    src.mkdir(parents=True)
+    (src / "__init__.py").write_text("")
+    (src / "api.py").write_text(
+        # A lone surrogate is a valid str literal but can't be encoded as UTF-8
+        'SURROGATE: str = "\\ud800"\n\ndef hello(name: str) -> str:\n    return name\n'
+    )
+
+    service = InventoryService(
+        app_config={"include_functions": True, **config}, root_path=tmp_path / "src"
+    )
+    with service:
+        return service, service.run_inventory()
+
+
+def test_json_report_round_trips(tmp_path):
+    service, report = _run_inventory(
+        tmp_path, output_format="json", include_constants=True
+    )
+    out = tmp_path / "out" / "api.json"
+
+    service.write_report(report, str(out))
+    data = json.loads(out.read_text(encoding="utf-8"))
+
+    assert data["stats"] == report["stats"]
+    modules = {m["qname"]: m for m in data["packages"][0]["modules"]}
+    (func,) = modules["pkg.api"]["functions"]
+    assert func["qname"] == "pkg.api.hello"
+    assert func["signature"]["returns"] == "str"
+    (const,) = modules["pkg.api"]["constants"]
+    assert const["value"] == "\ud800"
+
+
+def test_yaml_report_escapes_lone_surrogates(tmp_path):
+    service, report = _run_inventory(
+        tmp_path, output_format="yaml", include_constants=True
+    )
+    out = tmp_path / "out" / "api.yaml"
+
+    service.write_report(report, str(out))
+    data = yaml.safe_load(out.read_text(encoding="utf-8"))
+
+    modules = {m["qname"]: m for m in data["packages"][0]["modules"]}
+    (const,) = modules["pkg.api"]["constants"]
+    assert const["value"] == "\ud800"
+    assert [f["name"] for f in modules["pkg.api"]["functions"]] == ["hello"]
+
+
+def test_unknown_output_format_is_rejected(tmp_path):
+    service, report = _run_inventory(tmp_path, output_format="xml")
+    out = tmp_path / "api.xml"
+
+    with pytest.raises(ValueError, match="output_format"):
+        service.write_report(report, str(out))
+    assert not out.exists()
+
+
+# --- pyproject metadata ---
+
+
+def _write_pyproject(tmp_path: Path, head: str, tail: str) -> str:
+    # Padding pushes `tail` past the leading slice that is parsed first
+    filler = "".join(f'key{i} = "{"x" * 60}"\n' for i in range(1200))
+    path = tmp_path / "pyproject.toml"
+    path.write_text(f"{head}\n[tool.filler]\n{filler}\n{tail}", encoding="utf-8")
+    return str(path)
+
+
+def test_pyproject_project_table_after_head_wins_over_poetry(tmp_path):
+    path = _write_pyproject(
+        tmp_path,
+        '[tool.poetry]\nname = "poetry-name"\nversion = "0.1"\n',
+        '[project]\nname = "proj-name"\nversion = "2.0"\n',
+    )
+
+    assert _read_pyproject_meta(path, 0) == ("proj-name", "2.0")
+
+
+def test_pyproject_project_subtable_in_head_is_not_final(tmp_path):
+    path = _write_pyproject(
+        tmp_path,
+        '[project.urls]\nHomepage = "https://example.com"\n',
+        '[project]\nname = "real"\nversion = "1.0"\n',
+    )
+
+    assert _read_pyproject_meta(path, 0) == ("real", "1.0")
+
+
+# --- Top-level def prefilter ---
+
+
+def test_prefilter_sees_class_after_bom(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_bytes(b"\xef\xbb\xbfclass A:\n    def f(self): pass\n")
+
+    _, record = ModuleParser.parse_file(str(path), "/mod.py", "mod", {})
+
+    assert [c["name"] for c in record["classes"]] == ["A"]
+
+
+def test_prefilter_skips_defless_modules_unless_needed(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text("x = (\n")
+
+    _, skipped = ModuleParser.parse_file(str(path), "/mod.py", "mod", {})
+    _, parsed = ModuleParser.parse_file(
+        str(path), "/mod.py", "mod", {"include_constants": True}
+    )
+
+    assert skipped == {"path": "/mod.py", "qname": "mod", "classes": []}
+    assert parsed.startswith("Parse Error:")